@@ -0,0 +1,3 @@
+"""
+pysemverx - SemVerX Python client (FilterFlash Oracle)
+"""
@@ -0,0 +1,39 @@
+"""
+Fast JSON encoding shared by pysemverx
+
+Uses orjson when installed and falls back to the stdlib json module.
+The two paths emit identical bytes only for plain (non-subclassed)
+dicts with ASCII str keys, lists, ASCII str, bool, None and int within
+64 bits. dumps() does not check this; callers validate their input
+first (see FilterFlashOracle.canonicalize).
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional acceleration
+    orjson = None
+
+
+def _dumps_orjson(obj: Any, sort_keys: bool, newline: bool) -> bytes:
+    option = 0
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if newline:
+        option |= orjson.OPT_APPEND_NEWLINE
+    return orjson.dumps(obj, option=option)
+
+
+def _dumps_stdlib(obj: Any, sort_keys: bool, newline: bool) -> bytes:
+    text = json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False)
+    if newline:
+        text += "\n"
+    return text.encode("utf-8")
+
+
+def dumps(obj: Any, sort_keys: bool = False, newline: bool = False) -> bytes:
+    """Encode to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return _dumps_orjson(obj, sort_keys, newline)
+    return _dumps_stdlib(obj, sort_keys, newline)
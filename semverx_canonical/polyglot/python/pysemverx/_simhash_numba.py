@@ -0,0 +1,44 @@
+"""
+Numba SimHash kernel for FilterFlash scoring
+
+Imported lazily by filterflash so that Numba's import and JIT cost is
+only paid by score() calls on large corpora.
+"""
+import numba
+import numpy as np
+
+from .filterflash import _FP_BITS, _NGRAM
+
+
+@numba.njit(inline="always", cache=True)
+def _mix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def simhash(buffer, offsets):
+    """Row-parallel SimHash kernel, identical output to _simhash_numpy"""
+    rows = offsets.shape[0] - 1
+    fingerprints = np.zeros(rows, dtype=np.uint64)
+    for row in numba.prange(rows):
+        start = offsets[row]
+        total = offsets[row + 1] - start - _NGRAM + 1
+        if total <= 0:
+            continue
+        counts = np.zeros(_FP_BITS, dtype=np.int64)
+        for i in range(total):
+            gram = np.uint64(0)
+            for k in range(_NGRAM):
+                gram = (gram << np.uint64(8)) | np.uint64(buffer[start + i + k])
+            h = _mix64(gram)
+            for bit in range(_FP_BITS):
+                counts[bit] += np.int64((h >> np.uint64(bit)) & np.uint64(1))
+        fingerprint = np.uint64(0)
+        for bit in range(_FP_BITS):
+            if 2 * counts[bit] > total:
+                fingerprint |= np.uint64(1) << np.uint64(bit)
+        fingerprints[row] = fingerprint
+    return fingerprints
@@ -3,27 +3,285 @@ FilterFlash Oracle Implementation (Canonical Reference)
 
 This is the authoritative implementation.
 All other language ports MUST produce identical outputs.
+
+Features are taken from the AST that CPython 3.11 (the interpreter CI
+runs the oracle on) produces for the artifact. Tree shapes and accepted
+syntax differ between CPython releases, so extract_features refuses to
+run on any other interpreter. The tree is walked in pre-order (children
+in field order):
+  ast_hash      SHA-256 hex of the node type names, each followed by a newline
+  control_flow  count per control-flow node type
+  literals      count per constant type name (int, str, bytes, ...)
+Artifacts that do not parse, or whose tree is deeper than _MAX_AST_DEPTH,
+hash their raw bytes and carry no counts. That rule depends only on the
+artifact: callers without enough recursion headroom to convert a tree of
+_MAX_AST_DEPTH get RecursionError, and MemoryError (which 3.11 also uses
+for parser stack overflow) always propagates.
+
+Scoring fingerprints each artifact with a 64-bit SimHash over byte
+trigrams. Each trigram is read big-endian into an integer and mixed with
+the SplitMix64 finalizer; a fingerprint bit is set when strictly more
+than half of the trigram hashes have it set. Coherence is the mean of
+1 - hamming(a, b) / 64 over the corpus.
+
+NumPy (and Numba, for corpora of at least _NUMBA_MIN_BYTES) only
+accelerate this computation; every backend yields bit-identical
+fingerprints.
+
+The canonical byte stream is compact UTF-8 JSON: object keys sorted by
+code point, no insignificant whitespace, non-ASCII left unescaped, and a
+single trailing newline. canonicalize only accepts the exact shape
+extract_features emits (plain dict, str and int types, no subclasses):
+  {"ast_hash": ASCII str, "control_flow": {ASCII str: int}, "literals": {ASCII str: int}}
+with counts in [0, 2**63). That subset encodes identically under orjson,
+the stdlib fallback and serde_json (without preserve_order); anything
+else raises TypeError.
 """
 import ast
 import hashlib
+import io
+import re
+import sys
+import tokenize
+from collections import Counter
+from functools import lru_cache
+from itertools import repeat
 from typing import Any, Dict, List
 
+from ._fastjson import dumps
+
+try:
+    import numpy as np
+except ImportError:  # optional acceleration
+    np = None
+
 COHERENCE_GATE = 0.954
 
+_ORACLE_PYTHON = ("cpython", (3, 11))
+
+_FEATURE_KEYS = frozenset({"ast_hash", "control_flow", "literals"})
+_MAX_COUNT = (1 << 63) - 1
+
+_MAX_AST_DEPTH = 500
+# CPython 3.11 converts parse trees up to this many levels per unit of
+# remaining recursion limit before raising RecursionError
+_AST_LEVELS_PER_FRAME = 3
+_PREFIX_OPS = frozenset({"-", "+", "~", "not"})
+_PREFIX_RUN = re.compile(rb"(?:(?:[-+~]|not\b)\s*){%d,}" % (_MAX_AST_DEPTH + 2))
+
+_CONTROL_FLOW = frozenset({
+    "If", "For", "AsyncFor", "While", "Try", "With", "AsyncWith",
+    "Break", "Continue", "Return", "Raise", "Yield", "YieldFrom", "Await",
+})
+
+_NGRAM = 3
+_FP_BITS = 64
+# Below this many corpus bytes NumPy beats loading/compiling the Numba kernel
+_NUMBA_MIN_BYTES = 1 << 20
+_MASK64 = (1 << 64) - 1
+
+
+def _opaque(artifact: bytes) -> Dict[str, Any]:
+    """Features of an artifact that has no usable AST"""
+    return {
+        "ast_hash": hashlib.sha256(artifact).hexdigest(),
+        "control_flow": {},
+        "literals": {},
+    }
+
+
+def _check_features(features: Dict[str, Any]) -> None:
+    """Reject anything but the exact shape extract_features emits"""
+    if type(features) is not dict or features.keys() != _FEATURE_KEYS:
+        raise TypeError("features must be a dict with keys %s" % ", ".join(sorted(_FEATURE_KEYS)))
+    ast_hash = features["ast_hash"]
+    if type(ast_hash) is not str or not ast_hash.isascii():
+        raise TypeError("ast_hash must be an ASCII str")
+    for name in ("control_flow", "literals"):
+        counts = features[name]
+        if type(counts) is not dict:
+            raise TypeError("%s must be a dict" % name)
+        for key, count in counts.items():
+            if type(key) is not str or not key.isascii():
+                raise TypeError("%s keys must be ASCII str" % name)
+            if type(count) is not int or not 0 <= count <= _MAX_COUNT:
+                raise TypeError("%s counts must be int in [0, 2**63)" % name)
+
+
+def _stack_depth() -> int:
+    frame, depth = sys._getframe(), 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+def _deep_prefix_chain(artifact: bytes) -> bool:
+    """True if a run of unary operator tokens nests past _MAX_AST_DEPTH
+
+    Such chains would exceed the depth bound if they parsed at all, and
+    long ones overflow the parser stack, so they are rejected up front.
+    """
+    if _PREFIX_RUN.search(artifact) is None:
+        return False
+    run = 0
+    try:
+        for token in tokenize.tokenize(io.BytesIO(artifact).readline):
+            if token.type in (tokenize.OP, tokenize.NAME) and token.string in _PREFIX_OPS:
+                run += 1
+                if run > _MAX_AST_DEPTH + 1:
+                    return True
+            elif token.type not in (tokenize.NL, tokenize.COMMENT):
+                run = 0
+    except (tokenize.TokenError, SyntaxError):
+        pass
+    return False
+
+
+def _mix64(x: int) -> int:
+    """SplitMix64 finalizer (reference for all ports)"""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _simhash(data: bytes) -> int:
+    """64-bit SimHash of byte trigrams (pure Python reference)"""
+    total = len(data) - _NGRAM + 1
+    if total <= 0:
+        return 0
+    counts = [0] * _FP_BITS
+    for i in range(total):
+        h = _mix64(int.from_bytes(data[i:i + _NGRAM], "big"))
+        for bit in range(_FP_BITS):
+            counts[bit] += (h >> bit) & 1
+    fingerprint = 0
+    for bit, ones in enumerate(counts):
+        if 2 * ones > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+if np is not None:
+
+    def _pack_corpus(corpus: List[bytes]):
+        """Concatenate corpus into one flat uint8 buffer plus row offsets"""
+        offsets = np.zeros(len(corpus) + 1, dtype=np.int64)
+        np.cumsum([len(blob) for blob in corpus], out=offsets[1:])
+        # Trailing zeros give every position a full trigram window
+        buffer = np.frombuffer(b"".join(corpus) + bytes(_NGRAM - 1), dtype=np.uint8)
+        return buffer, offsets
+
+    def _mix64_np(x):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+    def _simhash_numpy(buffer, offsets):
+        """Vectorized SimHash over every row of the packed corpus"""
+        positions = buffer.shape[0] - _NGRAM + 1
+        grams = np.zeros(positions, dtype=np.uint64)
+        for k in range(_NGRAM):
+            grams = (grams << np.uint64(8)) | buffer[k:k + positions].astype(np.uint64)
+        hashes = _mix64_np(grams)
+        del grams
+        starts, ends = offsets[:-1], offsets[1:]
+        # Windows running past the end of their row hash to 0 and add no bits
+        for k in range(1, _NGRAM):
+            tail = ends - k
+            hashes[tail[tail >= starts]] = 0
+        totals = np.maximum(ends - starts - _NGRAM + 1, 0)
+        bits = np.empty(positions, dtype=np.uint64)
+        ones = np.zeros(positions + 1, dtype=np.uint64)
+        fingerprints = np.zeros(starts.shape[0], dtype=np.uint64)
+        for bit in range(_FP_BITS):
+            np.right_shift(hashes, np.uint64(bit), out=bits)
+            np.bitwise_and(bits, np.uint64(1), out=bits)
+            np.cumsum(bits, out=ones[1:])
+            per_row = (ones[ends] - ones[starts]).astype(np.int64)
+            fingerprints |= (2 * per_row > totals).astype(np.uint64) << np.uint64(bit)
+        return fingerprints
+
+    def _hamming(fingerprints, target: int) -> int:
+        """Total popcount of fingerprints XOR target"""
+        diff = fingerprints ^ np.uint64(target)
+        return int(np.unpackbits(diff.view(np.uint8)).sum())
+
+
+@lru_cache(maxsize=None)
+def _numba_kernel():
+    """Row-parallel Numba SimHash kernel, or None if Numba is unavailable"""
+    if np is None:
+        return None
+    try:
+        from ._simhash_numba import simhash
+    except ImportError:
+        return None
+    return simhash
+
+
 class FilterFlashOracle:
     """Canonical FilterFlash implementation"""
     
     def extract_features(self, artifact: bytes) -> Dict[str, Any]:
         """Extract structural features from artifact"""
-        # TODO: Implement full feature extraction
-        return {}
+        running = (sys.implementation.name, sys.version_info[:2])
+        if running != _ORACLE_PYTHON:
+            raise RuntimeError(
+                "FilterFlash features are defined by %s %d.%d; running %s %d.%d"
+                % (_ORACLE_PYTHON[0], *_ORACLE_PYTHON[1], running[0], *running[1])
+            )
+        headroom = sys.getrecursionlimit() - _stack_depth() - 1
+        if _AST_LEVELS_PER_FRAME * headroom <= _MAX_AST_DEPTH + 16:
+            raise RecursionError("not enough recursion headroom to parse %d AST levels" % _MAX_AST_DEPTH)
+        if _deep_prefix_chain(artifact):
+            return _opaque(artifact)
+        try:
+            tree = ast.parse(artifact)
+        except (SyntaxError, ValueError):
+            return _opaque(artifact)
+        except RecursionError:
+            # Headroom covers _MAX_AST_DEPTH, so the tree is deeper than that
+            return _opaque(artifact)
+        names = []
+        literals = []
+        stack = [(tree, 1)]
+        while stack:
+            node, depth = stack.pop()
+            names.append(type(node).__name__)
+            if isinstance(node, ast.Constant):
+                literals.append(type(node.value).__name__)
+            children = list(ast.iter_child_nodes(node))
+            if children:
+                if depth == _MAX_AST_DEPTH:
+                    return _opaque(artifact)
+                children.reverse()
+                stack.extend(zip(children, repeat(depth + 1)))
+        digest = hashlib.sha256("".join(name + "\n" for name in names).encode("ascii"))
+        return {
+            "ast_hash": digest.hexdigest(),
+            "control_flow": dict(Counter(name for name in names if name in _CONTROL_FLOW)),
+            "literals": dict(Counter(literals)),
+        }
     
     def canonicalize(self, features: Dict[str, Any]) -> bytes:
         """Canonicalize features to deterministic representation"""
-        # TODO: Implement canonicalization
-        return b""
+        _check_features(features)
+        return dumps(features, sort_keys=True, newline=True)
     
     def score(self, canonical: bytes, corpus: List[bytes]) -> float:
         """Compute coherence score ∈ [0, 1]"""
-        # TODO: Implement scoring
-        return 0.0
+        if not corpus:
+            return 0.0
+        target = _simhash(canonical)
+        if np is None:
+            distance = sum(bin(target ^ _simhash(blob)).count("1") for blob in corpus)
+        else:
+            buffer, offsets = _pack_corpus(corpus)
+            kernel = _simhash_numpy
+            if offsets[-1] >= _NUMBA_MIN_BYTES:
+                kernel = _numba_kernel() or _simhash_numpy
+            distance = _hamming(kernel(buffer, offsets), target)
+        return 1.0 - distance / (_FP_BITS * len(corpus))
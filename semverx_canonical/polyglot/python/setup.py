@@ -6,5 +6,13 @@ setup(
     description="SemVerX Python client (FilterFlash Oracle)",
     author="OBINexus",
     packages=find_packages(),
-    python_requires=">=3.8",
+    # The oracle's features are defined by the CPython 3.11 parser
+    python_requires="~=3.11.0",
+    classifiers=[
+        "Programming Language :: Python :: 3.11",
+        "Programming Language :: Python :: Implementation :: CPython",
+    ],
+    extras_require={
+        "accel": ["numpy>=1.20", "numba>=0.53", "orjson>=3.5"],
+    },
 )
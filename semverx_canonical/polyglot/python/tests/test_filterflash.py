@@ -0,0 +1,227 @@
+"""
+FilterFlash oracle tests
+
+Backend equivalence (pure Python / NumPy / Numba, orjson / stdlib) and
+pinned outputs that the other language ports must reproduce.
+"""
+import hashlib
+import random
+import sys
+from collections import namedtuple
+
+import pytest
+
+from pysemverx import _fastjson, filterflash
+from pysemverx.filterflash import FilterFlashOracle
+
+ON_ORACLE_PYTHON = (sys.implementation.name, sys.version_info[:2]) == filterflash._ORACLE_PYTHON
+
+SOURCE = (
+    b"import os\n"
+    b"\n"
+    b"\n"
+    b"def f(xs):\n"
+    b"    for x in xs[1:]:\n"
+    b"        if x:\n"
+    b"            return \"a\" + str(x)\n"
+    b"    while True:\n"
+    b"        break\n"
+    b"    return None\n"
+)
+
+
+def _corpora():
+    rng = random.Random(954)
+    yield [b""]
+    yield [b"", b"a", b"ab", b"abc", b""]
+    yield [bytes(range(256)) * 3]
+    for _ in range(20):
+        sizes = [rng.choice([0, 1, 2, 3, 4, rng.randrange(1000)]) for _ in range(rng.randrange(1, 30))]
+        yield [bytes(rng.randrange(256) for _ in range(size)) for size in sizes]
+
+
+def test_simhash_pinned():
+    assert filterflash._simhash(b"") == 0
+    assert filterflash._simhash(b"ab") == 0
+    assert filterflash._simhash(b"abc") == 0xD48D371BD2E69DA2
+    assert filterflash._simhash(b"FilterFlash") == 0x35E845CAB661A297
+
+
+@pytest.mark.parametrize("corpus", list(_corpora()))
+def test_simhash_numpy_matches_reference(corpus):
+    pytest.importorskip("numpy")
+    buffer, offsets = filterflash._pack_corpus(corpus)
+    fingerprints = filterflash._simhash_numpy(buffer, offsets)
+    assert [int(fp) for fp in fingerprints] == [filterflash._simhash(blob) for blob in corpus]
+
+
+@pytest.mark.parametrize("corpus", list(_corpora()))
+def test_simhash_numba_matches_reference(corpus):
+    pytest.importorskip("numpy")
+    pytest.importorskip("numba")
+    buffer, offsets = filterflash._pack_corpus(corpus)
+    fingerprints = filterflash._numba_kernel()(buffer, offsets)
+    assert [int(fp) for fp in fingerprints] == [filterflash._simhash(blob) for blob in corpus]
+
+
+def test_score_bounds():
+    oracle = FilterFlashOracle()
+    assert oracle.score(b"abcdef", []) == 0.0
+    assert oracle.score(b"abcdef", [b"abcdef"]) == 1.0
+    assert 0.0 <= oracle.score(b"abcdef", [b"", b"xyz", b"abcdeg"]) <= 1.0
+
+
+def test_score_backends_agree(monkeypatch):
+    oracle = FilterFlashOracle()
+    corpus = list(_corpora())[-1]
+    expected = oracle.score(SOURCE, corpus)
+    if filterflash._numba_kernel() is not None:
+        monkeypatch.setattr(filterflash, "_NUMBA_MIN_BYTES", 0)
+        assert oracle.score(SOURCE, corpus) == expected
+    monkeypatch.setattr(filterflash, "np", None)
+    assert oracle.score(SOURCE, corpus) == expected
+
+
+VALID_JSON = [
+    {},
+    [],
+    {"b": [1, True, None], "a": {"e": -(2 ** 63), "z": 2 ** 64 - 1}},
+    "".join(chr(c) for c in range(0x80)) + "\u2028\u00e9\U0001F600",
+    [[[["deep"]]]],
+]
+
+
+class _Str(str):
+    pass
+
+
+_Point = namedtuple("_Point", "a b")
+
+
+def _features(**overrides):
+    features = {"ast_hash": "ab" * 32, "control_flow": {"If": 1}, "literals": {"int": 2}}
+    features.update(overrides)
+    return features
+
+
+INVALID_JSON = [
+    {"f": 1e16},
+    {1: 2},
+    {"p": _Point(1, 2)},
+    {_Str("k"): "v"},
+    [],
+    _features(extra=1),
+    {"ast_hash": "ab", "control_flow": {}},
+    _features(ast_hash=1),
+    _features(ast_hash=_Str("ab")),
+    _features(ast_hash="\u00e9"),
+    _features(control_flow=[("If", 1)]),
+    _features(control_flow={_Str("If"): 1}),
+    _features(control_flow={1: 1}),
+    _features(control_flow={"\ud800": 1}),
+    _features(literals={"int": 1e16}),
+    _features(literals={"int": True}),
+    _features(literals={"int": 2 ** 63}),
+    _features(literals={"int": -1}),
+    _features(literals={"int": _Point(1, 2)}),
+]
+
+
+@pytest.mark.parametrize("value", VALID_JSON)
+def test_dumps_backends_identical(value):
+    pytest.importorskip("orjson")
+    for sort_keys in (False, True):
+        for newline in (False, True):
+            assert _fastjson._dumps_orjson(value, sort_keys, newline) == _fastjson._dumps_stdlib(
+                value, sort_keys, newline
+            )
+
+
+@pytest.mark.parametrize("value", INVALID_JSON)
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_canonicalize_rejects_same_way(monkeypatch, value, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(_fastjson, "orjson", None)
+    with pytest.raises(TypeError):
+        FilterFlashOracle().canonicalize(value)
+
+
+def test_canonicalize_backends_identical(monkeypatch):
+    pytest.importorskip("orjson")
+    features = _features(literals={"int": 2 ** 63 - 1, "str": 0, "NoneType": 3})
+    expected = FilterFlashOracle().canonicalize(features)
+    monkeypatch.setattr(_fastjson, "orjson", None)
+    assert FilterFlashOracle().canonicalize(features) == expected
+
+
+@pytest.mark.skipif(not ON_ORACLE_PYTHON, reason="features are defined on the oracle interpreter")
+def test_extract_features_pinned():
+    oracle = FilterFlashOracle()
+    features = oracle.extract_features(SOURCE)
+    assert features == {
+        "ast_hash": "b6a82e678b649f36913586a323b7046187533f47daa8c42654dfdf7db5c01f0c",
+        "control_flow": {"Break": 1, "For": 1, "If": 1, "Return": 2, "While": 1},
+        "literals": {"NoneType": 1, "bool": 1, "int": 1, "str": 1},
+    }
+    assert oracle.canonicalize(features) == (
+        b'{"ast_hash":"b6a82e678b649f36913586a323b7046187533f47daa8c42654dfdf7db5c01f0c",'
+        b'"control_flow":{"Break":1,"For":1,"If":1,"Return":2,"While":1},'
+        b'"literals":{"NoneType":1,"bool":1,"int":1,"str":1}}\n'
+    )
+
+
+@pytest.mark.skipif(not ON_ORACLE_PYTHON, reason="features are defined on the oracle interpreter")
+@pytest.mark.parametrize("artifact", [b"def (:", b"a\x00b", b"-" * 100000 + b"1"])
+def test_extract_features_unparseable(artifact):
+    assert FilterFlashOracle().extract_features(artifact) == {
+        "ast_hash": hashlib.sha256(artifact).hexdigest(),
+        "control_flow": {},
+        "literals": {},
+    }
+
+
+DEEP_ARTIFACTS = [
+    b"-" * 2500 + b"1",
+    b"-" * 3000 + b"1",
+    b"+".join([b"1"] * 2000),
+    b"+".join([b"1"] * 400),
+    b"# " + b"-" * 800 + b"\nx = -1\n",
+    SOURCE,
+]
+
+
+def _call_at_depth(frames, func):
+    if frames:
+        return _call_at_depth(frames - 1, func)
+    return func()
+
+
+@pytest.mark.skipif(not ON_ORACLE_PYTHON, reason="features are defined on the oracle interpreter")
+@pytest.mark.parametrize("limit", [1000, 20000])
+@pytest.mark.parametrize("frames", [0, 600])
+def test_extract_features_independent_of_recursion_state(limit, frames):
+    oracle = FilterFlashOracle()
+    expected = [oracle.extract_features(artifact) for artifact in DEEP_ARTIFACTS]
+    previous = sys.getrecursionlimit()
+    sys.setrecursionlimit(limit)
+    try:
+        got = _call_at_depth(frames, lambda: [oracle.extract_features(a) for a in DEEP_ARTIFACTS])
+    finally:
+        sys.setrecursionlimit(previous)
+    assert got == expected
+    assert [bool(features["literals"]) for features in got] == [False, False, False, True, True, True]
+
+
+@pytest.mark.skipif(not ON_ORACLE_PYTHON, reason="features are defined on the oracle interpreter")
+def test_extract_features_needs_recursion_headroom():
+    frames = sys.getrecursionlimit() - filterflash._stack_depth() - 150
+    with pytest.raises(RecursionError, match="headroom"):
+        _call_at_depth(frames, lambda: FilterFlashOracle().extract_features(SOURCE))
+
+
+@pytest.mark.skipif(ON_ORACLE_PYTHON, reason="only other interpreters are refused")
+def test_extract_features_refuses_other_interpreters():
+    with pytest.raises(RuntimeError):
+        FilterFlashOracle().extract_features(SOURCE)